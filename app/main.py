@@ -1,21 +1,38 @@
 import asyncio
+import contextlib
+import functools
+import heapq
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
+from starlette.websockets import WebSocketState
 from jinja2 import TemplateNotFound, ChoiceLoader, FileSystemLoader
-from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from aiobotocore.config import AioConfig
+from aiobotocore.session import get_session
+import redis.asyncio as aioredis
 from decimal import Decimal
-import json
+import orjson
 import os
+import re
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-worker lock, every worker reads
+    fcntl = None
 import logging
 import traceback
-from typing import Optional, Dict
-from datetime import datetime, timezone
-from pydantic import BaseModel
+from typing import Optional, Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 # --- Logging Setup ---
 logging.basicConfig(
@@ -24,22 +41,54 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-# --- Helper Class ---
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super(DecimalEncoder, self).default(obj)
+# --- JSON Helpers ---
+def _json_default(obj):
+    """orjson fallback for types it cannot encode natively (DynamoDB Decimals).
+
+    Called once per Decimal while the item is encoded, so responses never need
+    a separate pass to coerce numbers first.
+    """
+    if isinstance(obj, Decimal):
+        # Whole numbers stay integers as long as orjson can encode them.
+        if obj == obj.to_integral_value() and -(2**63) <= obj < 2**64:
+            return int(obj)
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _dumps(obj) -> str:
+    return orjson.dumps(obj, default=_json_default).decode()
 
 
 from dotenv import load_dotenv
 
+# Shared botocore settings: a pool large enough that concurrent requests reuse
+# kept-alive connections instead of queueing for one or re-handshaking, short
+# timeouts, and adaptive client-side retry throttling.
+AWS_MAX_POOL_CONNECTIONS = 64
+_AWS_CLIENT_SETTINGS = dict(
+    max_pool_connections=AWS_MAX_POOL_CONNECTIONS,
+    connect_timeout=2,
+    read_timeout=5,
+    retries={"mode": "adaptive", "max_attempts": 3},
+    tcp_keepalive=True,
+)
+AWS_CLIENT_CONFIG = Config(**_AWS_CLIENT_SETTINGS)
+AIO_CLIENT_CONFIG = AioConfig(**_AWS_CLIENT_SETTINGS)
+aio_session = get_session()
+
 
 # --- Helpers ---
+@functools.lru_cache(maxsize=None)
+def _get_ssm_client(region_name: str):
+    return boto3.client("ssm", region_name=region_name, config=AWS_CLIENT_CONFIG)
+
+
+@functools.lru_cache(maxsize=32)
 def _get_ssm_parameter(parameter_name: str, region_name: str) -> str | None:
     """Fetch a parameter value from AWS SSM Parameter Store, or None on failure."""
     try:
-        ssm_client = boto3.client("ssm", region_name=region_name)
+        ssm_client = _get_ssm_client(region_name)
         response = ssm_client.get_parameter(Name=parameter_name, WithDecryption=True)
         value = response.get("Parameter", {}).get("Value")
         if value:
@@ -79,13 +128,54 @@ DETAILS_TABLE_NAME = f"{TABLE_PREFIX}contactDetails"
 CUSTOMER_TRANSCRIPT_TABLE_NAME = f"{TABLE_PREFIX}contactTranscriptSegments"
 AGENT_TRANSCRIPT_TABLE_NAME = f"{TABLE_PREFIX}contactTranscriptSegmentsToCustomer"
 
-print("DETAILS_TABLE_NAME:", DETAILS_TABLE_NAME)
-print("CUSTOMER_TRANSCRIPT_TABLE_NAME:", CUSTOMER_TRANSCRIPT_TABLE_NAME)
-print("AGENT_TRANSCRIPT_TABLE_NAME:", AGENT_TRANSCRIPT_TABLE_NAME)
+if logger.isEnabledFor(logging.DEBUG):
+    logger.debug(
+        "Tables: details=%s customer=%s agent=%s cwd=%s",
+        DETAILS_TABLE_NAME,
+        CUSTOMER_TRANSCRIPT_TABLE_NAME,
+        AGENT_TRANSCRIPT_TABLE_NAME,
+        os.getcwd(),
+    )
+
+CONNECT_REGION = AWS_REGION
+# Synchronous boto3 calls (Connect) run via asyncio.to_thread so they never block the
+# event loop; the default executor is capped at the connection pool size.
+AWS_THREADPOOL_SIZE = AWS_MAX_POOL_CONNECTIONS
+
 
-print("Current working directory:", os.getcwd())
 # --- Initialization ---
-app = FastAPI()
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create AWS clients and background tasks per worker, and tear them down."""
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=AWS_THREADPOOL_SIZE, thread_name_prefix="aws")
+    )
+    # One aiobotocore client serves every DynamoDB call; unlike boto3
+    # resources it is safe to share and needs no threads.
+    aws_clients = contextlib.AsyncExitStack()
+    app.state.dynamodb = await aws_clients.enter_async_context(
+        aio_session.create_client(
+            "dynamodb", region_name=AWS_REGION, config=AIO_CLIENT_CONFIG
+        )
+    )
+    app.state.connect = boto3.client(
+        "connect", region_name=CONNECT_REGION, config=AWS_CLIENT_CONFIG
+    )
+    # connect_contact_client = boto3.client("connectcontactlens", region_name=CONNECT_REGION)
+
+    await incoming_calls_manager.start()
+    await details_writer.start()
+    await transcript_streams.start()
+    try:
+        yield
+    finally:
+        await transcript_streams.stop()
+        await details_writer.stop()
+        await incoming_calls_manager.stop()
+        await aws_clients.aclose()
+
+
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -93,6 +183,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Compress larger bodies such as /details items with long transcripts.
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 templates = Jinja2Templates(
     directory=os.path.join(os.path.dirname(__file__), "templates")
 )
@@ -106,16 +198,51 @@ if os.path.isdir(_static_dir):
     app.mount("/static", StaticFiles(directory=_static_dir), name="static")
 else:
     logger.info(f"Static directory not found, skipping mount: {_static_dir}")
-dynamodb = boto3.resource("dynamodb", region_name=AWS_REGION)
 
-details_table = dynamodb.Table(DETAILS_TABLE_NAME)
-customer_table = dynamodb.Table(CUSTOMER_TRANSCRIPT_TABLE_NAME)
-agent_table = dynamodb.Table(AGENT_TRANSCRIPT_TABLE_NAME)
 
-# --- AWS Connect Clients and Call Manager ---
-CONNECT_REGION = AWS_REGION
-connect_client = boto3.client("connect", region_name=CONNECT_REGION)
-# connect_contact_client = boto3.client("connectcontactlens", region_name=CONNECT_REGION)
+def get_dynamodb_client():
+    """aiobotocore DynamoDB client created in the lifespan."""
+    return app.state.dynamodb
+
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+def _serialize_item(item: dict) -> dict:
+    """Convert a plain Python item into DynamoDB attribute values."""
+    return {key: _serializer.serialize(value) for key, value in item.items()}
+
+
+def _deserialize_image(image: dict) -> dict:
+    """Convert DynamoDB attribute values (an item or stream image) into plain Python."""
+    return {key: _deserializer.deserialize(value) for key, value in image.items()}
+
+
+def get_connect_client():
+    return app.state.connect
+
+
+# GSI on the details table with a constant partition key and callTimestamp as
+# sort key, so the newest call is a single Query instead of a Scan.
+LATEST_CALL_INDEX = "GSI1"
+LATEST_CALL_PARTITION = "ALL"
+# While the index is missing or still backfilling, /latest-call scans instead
+# and only checks for the index again after this many seconds.
+LATEST_CALL_INDEX_RECHECK = 300.0
+_latest_call_index_retry_at = 0.0  # time.monotonic() of the next index attempt
+
+
+def _is_index_unavailable(error: ClientError) -> bool:
+    """True if a Query failed only because the GSI is missing or backfilling."""
+    if error.response["Error"]["Code"] != "ValidationException":
+        return False
+    message = error.response["Error"].get("Message", "")
+    return "specified index" in message or "backfilling" in message
+
+
+# --- AWS Connect Call Manager ---
+_NON_DIGITS = re.compile(r"\D")
 
 
 class CallManager:
@@ -133,11 +260,16 @@ class CallManager:
         self.queue_id = os.getenv("CONNECT_QUEUE_ID")
 
         raw_source = os.getenv("CONNECT_SOURCE_PHONE", "your-connect-phone-number")
-        if raw_source.startswith("+"):
-            digits = "+" + "".join(ch for ch in raw_source if ch.isdigit())
-        else:
-            digits = "+" + "".join(ch for ch in raw_source if ch.isdigit())
-        self.source_phone_number = digits
+        self.source_phone_number = self.normalize_phone_number(raw_source)
+
+    @staticmethod
+    def normalize_phone_number(raw: str) -> str:
+        """Strip formatting from an international number, e.g. '+1 (555) 123-4567'.
+
+        The input must already carry its country code; national numbers such
+        as '555-123-4567' cannot be turned into E.164 this way.
+        """
+        return "+" + _NON_DIGITS.sub("", raw)
 
     async def initiate_outbound_call(self, agent_id: str, phone_number: str) -> str:
         try:
@@ -151,7 +283,9 @@ class CallManager:
             if self.queue_id:
                 params["QueueId"] = self.queue_id
 
-            response = connect_client.start_outbound_voice_contact(**params)
+            response = await asyncio.to_thread(
+                get_connect_client().start_outbound_voice_contact, **params
+            )
             return response["ContactId"]
         except Exception as e:
             logger.error(f"initiate_outbound_call failed: {e}")
@@ -159,8 +293,10 @@ class CallManager:
 
     async def get_agent_status(self, agent_id: str):
         try:
-            response = connect_client.describe_user(
-                UserId=agent_id, InstanceId=self.instance_id
+            response = await asyncio.to_thread(
+                get_connect_client().describe_user,
+                UserId=agent_id,
+                InstanceId=self.instance_id,
             )
             return response
         except Exception as e:
@@ -175,40 +311,828 @@ active_agent_connections: Dict[str, WebSocket] = {}
 
 
 # --- Incoming Calls Broadcast Manager and API ---
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
 class IncomingCall(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     contactId: str
     phoneNumber: Optional[str] = None
     customerName: Optional[str] = None
-    callTimestamp: Optional[str] = None  # ISO8601
-    metadata: Optional[dict] = None
+    callTimestamp: str = Field(default_factory=_utc_now_iso)  # ISO8601
+    metadata: dict = Field(default_factory=dict)
+
+    # Missing, null or empty values get the defaults, so the model dump is
+    # the stored/broadcast item as-is.
+    @field_validator("callTimestamp", mode="before")
+    @classmethod
+    def _default_timestamp(cls, value):
+        return value or _utc_now_iso()
+
+    @field_validator("metadata", mode="before")
+    @classmethod
+    def _default_metadata(cls, value):
+        return value or {}
+
+    @field_validator("phoneNumber")
+    @classmethod
+    def _normalize_phone_number(cls, value):
+        # Only numbers that already carry a country code are normalized;
+        # national numbers and "anonymous" caller IDs are stored as received.
+        if value and value.lstrip().startswith("+"):
+            return CallManager.normalize_phone_number(value)
+        return value
+
+
+BROADCAST_QUEUE_SIZE = 32  # pending messages per client before it is dropped
+PRUNE_INTERVAL = 60.0  # seconds between stale-connection sweeps
+INCOMING_CALLS_CHANNEL = "incoming-calls"
+# Redis shared by all workers for pub/sub, e.g. redis://host:6379. Without it
+# broadcasts only reach clients connected to the worker that received them.
+BROADCAST_URL = os.getenv("BROADCAST_URL")
+# Seconds between pub/sub connection health checks, so a dead connection is
+# noticed even when no calls are coming in.
+BROADCAST_HEALTH_CHECK_INTERVAL = 30
 
 
 class IncomingCallsManager:
-    def __init__(self) -> None:
-        self.active_connections: list[WebSocket] = []
+    def __init__(self, backend: Optional[aioredis.Redis] = None) -> None:
+        self.backend = backend
+        self._subscriber_task: Optional[asyncio.Task] = None
+        # True while this worker receives published messages; until then
+        # broadcasts are also delivered locally so none are lost.
+        self._subscribed = False
+        # Per-client send queue and the relay task draining it, so a slow
+        # client never holds up delivery to the others.
+        self.active_connections: Dict[WebSocket, asyncio.Queue] = {}
+        self._relay_tasks: Dict[WebSocket, asyncio.Task] = {}
+        self._prune_task: Optional[asyncio.Task] = None
+        self._close_tasks: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        if self.backend:
+            self._subscriber_task = asyncio.create_task(self._subscribe_loop())
+        self._prune_task = asyncio.create_task(self._prune_loop())
+
+    async def stop(self) -> None:
+        tasks = [t for t in (self._prune_task, self._subscriber_task) if t]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._prune_task = self._subscriber_task = None
+        if self.backend:
+            with contextlib.suppress(Exception):
+                await self.backend.aclose()
 
     def connect(self, websocket: WebSocket) -> None:
-        if websocket not in self.active_connections:
-            self.active_connections.append(websocket)
+        if websocket in self.active_connections:
+            return
+        queue: asyncio.Queue = asyncio.Queue(maxsize=BROADCAST_QUEUE_SIZE)
+        self.active_connections[websocket] = queue
+        self._relay_tasks[websocket] = asyncio.create_task(
+            self._relay(websocket, queue)
+        )
 
     def disconnect(self, websocket: WebSocket) -> None:
+        self.active_connections.pop(websocket, None)
+        task = self._relay_tasks.pop(websocket, None)
+        if task:
+            task.cancel()
+
+    async def _relay(self, websocket: WebSocket, queue: asyncio.Queue) -> None:
         try:
-            self.active_connections.remove(websocket)
-        except ValueError:
-            pass
+            while True:
+                text = await queue.get()
+                await websocket.send_text(text)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.info(f"Dropping incoming-calls websocket after send failure: {e}")
+            self.disconnect(websocket)
+
+    async def _prune_loop(self) -> None:
+        while True:
+            await asyncio.sleep(PRUNE_INTERVAL)
+            await self._prune_stale()
+
+    async def _prune_stale(self) -> None:
+        """Close and forget sockets that are no longer connected.
+
+        Idle sockets are kept: the feed is legitimately silent between calls,
+        and half-open peers are caught by the websocket keepalive pings.
+        """
+        stale = [
+            ws
+            for ws in list(self.active_connections)
+            if ws.client_state != WebSocketState.CONNECTED
+            or ws.application_state != WebSocketState.CONNECTED
+        ]
+        for ws in stale:
+            self.disconnect(ws)
+            with contextlib.suppress(Exception):
+                await ws.close()
+        if stale:
+            logger.info(f"Pruned {len(stale)} stale incoming-calls websockets")
+
+    async def _subscribe_loop(self) -> None:
+        """Deliver messages published by any worker to this worker's clients.
+
+        Connection errors surface from ``listen``; the subscription is then
+        rebuilt on a fresh connection.
+        """
+        while True:
+            pubsub = self.backend.pubsub()
+            try:
+                await pubsub.subscribe(INCOMING_CALLS_CHANNEL)
+                self._subscribed = True
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._fan_out(message["data"].decode())
+                raise ConnectionError("pub/sub subscription ended")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Incoming-calls subscription failed, reconnecting: {e}")
+            finally:
+                self._subscribed = False
+                with contextlib.suppress(Exception):
+                    await pubsub.aclose()
+            await asyncio.sleep(1)
 
     async def broadcast(self, message: dict) -> None:
+        # Serialize once; the same text goes to every client's queue.
+        text = _dumps(message)
+        if self.backend:
+            try:
+                await self.backend.publish(INCOMING_CALLS_CHANNEL, text)
+                if self._subscribed:
+                    return
+            except Exception as e:
+                logger.error(
+                    f"Publishing incoming call failed, delivering locally: {e}"
+                )
+        self._fan_out(text)
+
+    def _fan_out(self, text: str) -> None:
         stale: list[WebSocket] = []
-        for ws in list(self.active_connections):
+        for ws, queue in list(self.active_connections.items()):
             try:
-                await ws.send_json(message)
-            except Exception:
+                queue.put_nowait(text)
+            except asyncio.QueueFull:
                 stale.append(ws)
         for ws in stale:
+            logger.warning("Dropping incoming-calls websocket with a full send queue")
             self.disconnect(ws)
+            # 1013 (try again later) tells the client to reconnect.
+            task = asyncio.create_task(self._close_quietly(ws, code=1013))
+            self._close_tasks.add(task)
+            task.add_done_callback(self._close_tasks.discard)
+
+    @staticmethod
+    async def _close_quietly(websocket: WebSocket, code: int = 1000) -> None:
+        with contextlib.suppress(Exception):
+            await websocket.close(code=code)
+
+
+incoming_calls_manager = IncomingCallsManager(
+    aioredis.from_url(
+        BROADCAST_URL, health_check_interval=BROADCAST_HEALTH_CHECK_INTERVAL
+    )
+    if BROADCAST_URL
+    else None
+)
+
+
+# --- Details Table Writer ---
+DETAILS_BATCH_SIZE = 25  # BatchWriteItem limit
+DETAILS_UNPROCESSED_ATTEMPTS = 5  # BatchWriteItem calls per batch
+DETAILS_UNPROCESSED_BACKOFF = 0.05  # first sleep before resending, doubled
+
+
+def _is_item_error(error: Exception) -> bool:
+    """True for failures caused by an item's content rather than the service.
+
+    Only these are worth retrying item by item; throttling and timeouts
+    would just be repeated once per item.
+    """
+    if isinstance(error, ClientError):
+        return error.response.get("Error", {}).get("Code") == "ValidationException"
+    # Raised by boto3's serializer, e.g. for float attribute values.
+    return isinstance(error, (TypeError, ValueError))
+
+
+class DetailsWriter:
+    """Coalesces details-table writes into BatchWriteItem calls.
+
+    Callers await ``put`` until their item has been written. Items queued
+    while a batch is in flight go out together in the next one (up to 25),
+    so bursts of incoming calls share signed requests without delaying a
+    lone write.
+    """
+
+    def __init__(self, table_name: str) -> None:
+        self.table_name = table_name
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def put(self, item: dict) -> None:
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        await future
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < DETAILS_BATCH_SIZE and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._write([item for item, _ in batch])
+            except Exception as e:
+                if len(batch) > 1 and _is_item_error(e):
+                    logger.warning(f"Details batch write failed, retrying items: {e}")
+                    await asyncio.gather(*(self._retry(i, f) for i, f in batch))
+                else:
+                    for _, future in batch:
+                        self._settle(future, e)
+            else:
+                for _, future in batch:
+                    self._settle(future)
+
+    async def _retry(self, item: dict, future: asyncio.Future) -> None:
+        # Write one item on its own so a bad item only fails its own caller.
+        try:
+            await get_dynamodb_client().put_item(
+                TableName=self.table_name, Item=_serialize_item(item)
+            )
+        except Exception as e:
+            self._settle(future, e)
+        else:
+            self._settle(future)
+
+    @staticmethod
+    def _settle(future: asyncio.Future, error: Optional[Exception] = None) -> None:
+        if future.done():
+            return
+        if error is None:
+            future.set_result(None)
+        else:
+            future.set_exception(error)
+
+    async def _write(self, items: list[dict]) -> None:
+        # BatchWriteItem rejects duplicate keys, so the last write wins when
+        # one batch holds the same contact twice.
+        requests = list(
+            {
+                item["contactId"]: {"PutRequest": {"Item": _serialize_item(item)}}
+                for item in items
+            }.values()
+        )
+        delay = DETAILS_UNPROCESSED_BACKOFF
+        for attempt in range(DETAILS_UNPROCESSED_ATTEMPTS):
+            if attempt:
+                # Unprocessed items mean the table is throttling; back off.
+                await asyncio.sleep(delay)
+                delay *= 2
+            response = await get_dynamodb_client().batch_write_item(
+                RequestItems={self.table_name: requests}
+            )
+            requests = response.get("UnprocessedItems", {}).get(self.table_name)
+            if not requests:
+                return
+        raise RuntimeError(
+            f"{len(requests)} details items still unprocessed after "
+            f"{DETAILS_UNPROCESSED_ATTEMPTS} attempts"
+        )
+
+
+details_writer = DetailsWriter(DETAILS_TABLE_NAME)
+
+
+# --- Transcript Stream Fan-out ---
+STREAM_POLL_INTERVAL = 1.0  # seconds between GetRecords rounds
+STREAM_SHARD_REFRESH_INTERVAL = 60.0  # seconds between shard list refreshes
+STREAM_MAX_BACKOFF = 30.0  # longest sleep after repeated throttling
+# Allowance for clock skew when filtering replayed records by creation time.
+STREAM_START_SLACK = timedelta(seconds=60)
+STREAM_THROTTLE_ERRORS = {
+    "LimitExceededException",
+    "ProvisionedThroughputExceededException",
+}
+# AWS recommends at most two readers per stream shard, so only one worker per
+# host reads the streams (whichever holds this lock) and the others poll.
+# Set TRANSCRIPT_STREAM_READER=false on hosts beyond the first two.
+TRANSCRIPT_STREAM_READER = os.getenv("TRANSCRIPT_STREAM_READER", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+TRANSCRIPT_STREAM_LOCK = os.getenv(
+    "TRANSCRIPT_STREAM_LOCK", "/tmp/travoiq-transcript-stream.lock"
+)
+FALLBACK_POLL_INTERVAL = 1.0
+TRANSCRIPT_QUEUE_SIZE = 256  # pending segments per viewer before it is dropped
+# Polls re-read from the oldest segment seen this far behind the newest one,
+# so a segment that lands late with an earlier timestamp is still picked up.
+FALLBACK_CURSOR_OVERLAP = timedelta(seconds=5)
+SEGMENT_PROJECTION = "SegmentId, LoggedOn, Transcript"
+
+
+def _logged_on(segment: dict) -> str:
+    return segment.get("LoggedOn", "")
+
+
+def _parse_logged_on(logged_on: str) -> Optional[datetime]:
+    """Best-effort LoggedOn parse: ISO 8601 or epoch seconds/milliseconds."""
+    try:
+        ts = datetime.fromisoformat(logged_on.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            value = float(logged_on)
+        except ValueError:
+            return None
+        if value > 1e11:  # epoch milliseconds
+            value /= 1000
+        return datetime.fromtimestamp(value, timezone.utc)
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def _prune_overlap(seen: Dict[str, str]) -> Dict[str, str]:
+    """Keep the seen segments (SegmentId -> LoggedOn) the next poll needs.
+
+    That is every segment within FALLBACK_CURSOR_OVERLAP of the newest, plus
+    the newest one before that window as an anchor. The cursor is the
+    smallest value kept, an original stored LoggedOn, so it sorts correctly
+    against the table whatever its format. When LoggedOn cannot be parsed
+    only the newest segment is kept (no overlap).
+    """
+    newest = max(seen.values())
+    newest_time = _parse_logged_on(newest)
+    if newest_time is None:
+        return {sid: lo for sid, lo in seen.items() if lo == newest}
+    floor = newest_time - FALLBACK_CURSOR_OVERLAP
+    kept: Dict[str, str] = {}
+    anchor: Optional[Tuple[str, str]] = None
+    for segment_id, logged_on in seen.items():
+        ts = _parse_logged_on(logged_on)
+        if logged_on == newest or (ts is not None and ts >= floor):
+            kept[segment_id] = logged_on
+        elif anchor is None or logged_on > anchor[1]:
+            anchor = (segment_id, logged_on)
+    if anchor:
+        kept[anchor[0]] = anchor[1]
+    return kept
+
+
+def _merge_segments(sources, results: list[list[dict]]):
+    """Merge per-table segment lists, each already ordered by LoggedOn.
+
+    Segments are labelled with their table's speaker as the merge consumes
+    them, so each list is walked only once.
+    """
+
+    def with_speaker(items: list[dict], speaker: str):
+        for seg in items:
+            seg["speaker"] = speaker
+            yield seg
+
+    return heapq.merge(
+        *(
+            with_speaker(items, speaker)
+            for (_, speaker), items in zip(sources, results)
+        ),
+        key=_logged_on,
+    )
+
+
+class TranscriptStreamManager:
+    """Pushes new transcript segments to the viewers of each contact.
+
+    One background task per transcript table reads the table's DynamoDB
+    Stream (NEW_IMAGE) and publishes inserted segments to the queues
+    subscribed for the segment's ContactId. Tables without a usable stream
+    fall back to a single poller per monitored contact, shared by all of its
+    viewers.
+    """
+
+    def __init__(self, sources: List[Tuple[str, str]]) -> None:
+        # (table name, speaker label) pairs
+        self.sources = sources
+        self.contact_subscribers: Dict[str, set[asyncio.Queue]] = {}
+        self._polled_sources: List[Tuple[str, str]] = []
+        self._stream_tasks: list[asyncio.Task] = []
+        self._pollers: Dict[str, asyncio.Task] = {}
+        self._dynamodb = None  # the app's aiobotocore DynamoDB client
+        # Tables whose sort key is LoggedOn: cursors go in the key condition
+        # and query results come back already ordered.
+        self._logged_on_sorted: set[str] = set()
+        self._reader_lock = None  # open lock file while this worker reads streams
+
+    async def start(self) -> None:
+        self._dynamodb = get_dynamodb_client()
+        for table_name, speaker in self.sources:
+            description = await self._describe_table(table_name)
+            if {"AttributeName": "LoggedOn", "KeyType": "RANGE"} in description.get(
+                "KeySchema", []
+            ):
+                self._logged_on_sorted.add(table_name)
+            stream_arn = self._get_stream_arn(description)
+            if stream_arn and self._claim_stream_reader():
+                logger.info(f"Consuming DynamoDB stream for table: {table_name}")
+                self._stream_tasks.append(
+                    asyncio.create_task(self._consume_stream(stream_arn, speaker))
+                )
+            else:
+                if not stream_arn:
+                    logger.warning(
+                        f"No NEW_IMAGE stream on table {table_name}; "
+                        "falling back to per-contact polling"
+                    )
+                self._polled_sources.append((table_name, speaker))
+
+    async def stop(self) -> None:
+        tasks = self._stream_tasks + list(self._pollers.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._stream_tasks.clear()
+        self._pollers.clear()
+        self._dynamodb = None
+        if self._reader_lock:
+            self._reader_lock.close()
+            self._reader_lock = None
+
+    def _claim_stream_reader(self) -> bool:
+        """Return True if this worker should read the DynamoDB Streams."""
+        if not TRANSCRIPT_STREAM_READER:
+            return False
+        if self._reader_lock or fcntl is None:
+            return True
+        lock = open(TRANSCRIPT_STREAM_LOCK, "a")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock.close()
+            logger.info(
+                "Another worker on this host reads the transcript streams; "
+                "falling back to per-contact polling"
+            )
+            return False
+        self._reader_lock = lock
+        return True
+
+    def subscribe(self, contact_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=TRANSCRIPT_QUEUE_SIZE)
+        self.contact_subscribers.setdefault(contact_id, set()).add(queue)
+        if self._polled_sources and contact_id not in self._pollers:
+            self._pollers[contact_id] = asyncio.create_task(
+                self._poll_contact(contact_id)
+            )
+        return queue
+
+    def unsubscribe(self, contact_id: str, queue: asyncio.Queue) -> None:
+        queues = self.contact_subscribers.get(contact_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self.contact_subscribers[contact_id]
+            poller = self._pollers.pop(contact_id, None)
+            if poller:
+                poller.cancel()
+
+    def publish(self, contact_id: Optional[str], segment: dict, speaker: str) -> None:
+        queues = self.contact_subscribers.get(contact_id)
+        if not queues:
+            return
+        message = {"speaker": speaker, "text": segment.get("Transcript", "")}
+        for queue in list(queues):
+            try:
+                queue.put_nowait((segment.get("SegmentId"), message))
+            except asyncio.QueueFull:
+                # The viewer stopped reading: drop it and leave a lone None
+                # so its relay closes the socket.
+                self.unsubscribe(contact_id, queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def fetch_history(self, contact_id: str) -> list[tuple]:
+        """Return (SegmentId, message) pairs already stored for a contact, oldest first."""
+        results = await asyncio.gather(
+            *(
+                self._query_segments(self._segment_queries(table_name, contact_id)[0])
+                for table_name, _ in self.sources
+            )
+        )
+        return [
+            (
+                seg.get("SegmentId"),
+                {"speaker": seg["speaker"], "text": seg.get("Transcript", "")},
+            )
+            for seg in _merge_segments(self.sources, results)
+        ]
+
+    def _segment_queries(self, table_name: str, contact_id: str) -> Tuple[dict, dict]:
+        """Prebuilt Query arguments for a contact's segments in one table.
 
+        Returns the full-history query and the incremental one; the latter
+        only needs its ``:last`` LoggedOn cursor filled in per call.
+        """
+        full = {
+            "TableName": table_name,
+            # --- FIX: Use 'ContactId' (Capital C, Capital I) to match the table's key schema ---
+            "KeyConditionExpression": "ContactId = :cid",
+            "ProjectionExpression": SEGMENT_PROJECTION,
+            "ExpressionAttributeValues": {":cid": {"S": contact_id}},
+        }
+        # Strongly consistent reads so a segment visible to one poll is never
+        # missing from it and then skipped by the advanced cursor.
+        if table_name in self._logged_on_sorted:
+            incremental = {
+                **full,
+                "KeyConditionExpression": "ContactId = :cid AND LoggedOn > :last",
+                "ConsistentRead": True,
+            }
+        else:
+            incremental = {
+                **full,
+                "FilterExpression": "LoggedOn > :last",
+                "ConsistentRead": True,
+            }
+        return full, incremental
+
+    async def _query_segments(self, query: dict, after: str = "") -> list[dict]:
+        """Run a prebuilt segment query and return its rows, oldest first.
+
+        ``after`` is the LoggedOn cursor for an incremental query.
+        """
+        params = dict(query)
+        if after:
+            params["ExpressionAttributeValues"] = {
+                **query["ExpressionAttributeValues"],
+                ":last": {"S": after},
+            }
+        key_sorted = query["TableName"] in self._logged_on_sorted
+
+        items: list[dict] = []
+        while True:
+            response = await self._dynamodb.query(**params)
+            items.extend(_deserialize_image(item) for item in response.get("Items", []))
+            last_key = response.get("LastEvaluatedKey")
+            if not last_key:
+                if not key_sorted:
+                    items.sort(key=_logged_on)
+                return items
+            params["ExclusiveStartKey"] = last_key
+
+    async def _describe_table(self, table_name: str) -> dict:
+        try:
+            response = await self._dynamodb.describe_table(TableName=table_name)
+        except Exception as e:
+            logger.warning(f"describe_table failed for {table_name}: {e}")
+            return {}
+        return response["Table"]
+
+    @staticmethod
+    def _get_stream_arn(description: dict) -> Optional[str]:
+        spec = description.get("StreamSpecification") or {}
+        if spec.get("StreamEnabled") and spec.get("StreamViewType") in (
+            "NEW_IMAGE",
+            "NEW_AND_OLD_IMAGES",
+        ):
+            return description.get("LatestStreamArn")
+        return None
+
+    @staticmethod
+    async def _list_shards(streams, stream_arn: str) -> list[dict]:
+        shards: list[dict] = []
+        params = {"StreamArn": stream_arn}
+        while True:
+            description = (await streams.describe_stream(**params))["StreamDescription"]
+            shards.extend(description.get("Shards", []))
+            last_shard_id = description.get("LastEvaluatedShardId")
+            if not last_shard_id:
+                return shards
+            params["ExclusiveStartShardId"] = last_shard_id
+
+    async def _consume_stream(self, stream_arn: str, speaker: str) -> None:
+        loop = asyncio.get_running_loop()
+        async with aio_session.create_client(
+            "dynamodbstreams", region_name=AWS_REGION, config=AIO_CLIENT_CONFIG
+        ) as streams:
+            # Shards being read: current iterator (None until one is fetched)
+            # and, once records arrive, the last SequenceNumber processed, so
+            # an expired or failed iterator resumes right after it.
+            iterators: Dict[str, Optional[str]] = {}
+            positions: Dict[str, str] = {}
+            start_types: Dict[str, str] = {}
+            # A shard first opened at LATEST that fails before returning a
+            # record has no position to resume from. It is reopened at
+            # TRIM_HORIZON instead, skipping records created before it was
+            # first opened.
+            since: Dict[str, datetime] = {}
+            finished: set[str] = set()
+            first_listing = True
+            next_refresh = 0.0
+            backoff = STREAM_POLL_INTERVAL
+            while True:
+                try:
+                    if loop.time() >= next_refresh:
+                        for shard in await self._list_shards(streams, stream_arn):
+                            shard_id = shard["ShardId"]
+                            if shard_id in iterators or shard_id in finished:
+                                continue
+                            closed = "EndingSequenceNumber" in shard.get(
+                                "SequenceNumberRange", {}
+                            )
+                            if first_listing and closed:
+                                # Only new segments are pushed; history is
+                                # read from the table when a viewer connects.
+                                finished.add(shard_id)
+                                continue
+                            if shard.get("ParentShardId") in iterators:
+                                # Read the parent to the end first to keep order.
+                                continue
+                            iterators[shard_id] = None
+                            start_types[shard_id] = (
+                                "LATEST" if first_listing else "TRIM_HORIZON"
+                            )
+                        first_listing = False
+                        next_refresh = loop.time() + STREAM_SHARD_REFRESH_INTERVAL
+
+                    for shard_id, iterator in list(iterators.items()):
+                        if iterator is None:
+                            iterator = await self._shard_iterator(
+                                streams,
+                                stream_arn,
+                                shard_id,
+                                positions.get(shard_id),
+                                start_types[shard_id],
+                            )
+                            iterators[shard_id] = iterator
+                            if start_types[shard_id] == "LATEST":
+                                start_types[shard_id] = "TRIM_HORIZON"
+                                since[shard_id] = (
+                                    datetime.now(timezone.utc) - STREAM_START_SLACK
+                                )
+                        response = await streams.get_records(ShardIterator=iterator)
+                        for record in response.get("Records", []):
+                            created = record["dynamodb"].get(
+                                "ApproximateCreationDateTime"
+                            )
+                            if not (
+                                shard_id in since
+                                and created
+                                and created < since[shard_id]
+                            ):
+                                self._dispatch(record, speaker)
+                            positions[shard_id] = record["dynamodb"]["SequenceNumber"]
+                        next_iterator = response.get("NextShardIterator")
+                        if next_iterator:
+                            iterators[shard_id] = next_iterator
+                        else:
+                            # Shard closed; pick up its children right away.
+                            del iterators[shard_id]
+                            positions.pop(shard_id, None)
+                            start_types.pop(shard_id, None)
+                            since.pop(shard_id, None)
+                            finished.add(shard_id)
+                            next_refresh = 0.0
+                    backoff = STREAM_POLL_INTERVAL
+                except asyncio.CancelledError:
+                    raise
+                except ClientError as e:
+                    code = e.response.get("Error", {}).get("Code")
+                    if code in STREAM_THROTTLE_ERRORS:
+                        # Iterators stay valid; just slow down.
+                        backoff = min(backoff * 2, STREAM_MAX_BACKOFF)
+                        logger.warning(
+                            f"DynamoDB stream {stream_arn} throttled ({code}); "
+                            f"backing off {backoff:.0f}s"
+                        )
+                    else:
+                        logger.error(f"Error reading DynamoDB stream {stream_arn}: {e}")
+                        iterators = dict.fromkeys(iterators)
+                except Exception as e:
+                    logger.error(
+                        f"Error reading DynamoDB stream {stream_arn}: {e}",
+                        exc_info=True,
+                    )
+                    iterators = dict.fromkeys(iterators)
+                await asyncio.sleep(backoff)
+
+    @staticmethod
+    async def _shard_iterator(
+        streams,
+        stream_arn: str,
+        shard_id: str,
+        after: Optional[str],
+        start_type: str,
+    ) -> str:
+        params = {"StreamArn": stream_arn, "ShardId": shard_id}
+        if after:
+            try:
+                response = await streams.get_shard_iterator(
+                    **params,
+                    ShardIteratorType="AFTER_SEQUENCE_NUMBER",
+                    SequenceNumber=after,
+                )
+                return response["ShardIterator"]
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") != (
+                    "TrimmedDataAccessException"
+                ):
+                    raise
+                # The position aged out of the stream; read what is left.
+                start_type = "TRIM_HORIZON"
+        response = await streams.get_shard_iterator(
+            **params, ShardIteratorType=start_type
+        )
+        return response["ShardIterator"]
+
+    def _dispatch(self, record: dict, speaker: str) -> None:
+        if record.get("eventName") != "INSERT":
+            return
+        image = record.get("dynamodb", {}).get("NewImage")
+        if not image:
+            return
+        segment = _deserialize_image(image)
+        self.publish(segment.get("ContactId"), segment, speaker)
+
+    async def _poll_contact(self, contact_id: str) -> None:
+        """Fallback for tables without a stream: one poller per contact.
+
+        Each table keeps a LoggedOn cursor so a poll only reads segments
+        written since the previous one, plus the overlap kept by
+        ``_prune_overlap``; segments seen within it are skipped by SegmentId.
+        """
+        cursors = {table_name: "" for table_name, _ in self._polled_sources}
+        # SegmentId -> LoggedOn of segments already published, per table
+        seen: Dict[str, Dict[str, str]] = {
+            table_name: {} for table_name, _ in self._polled_sources
+        }
+        # Query arguments are built once; each tick only swaps in the cursor.
+        queries = {
+            table_name: self._segment_queries(table_name, contact_id)
+            for table_name, _ in self._polled_sources
+        }
+        while True:
+            try:
+                results = await asyncio.gather(
+                    *(
+                        self._query_segments(
+                            queries[table_name][1 if cursors[table_name] else 0],
+                            cursors[table_name],
+                        )
+                        for table_name, _ in self._polled_sources
+                    )
+                )
+                for i, (table_name, _) in enumerate(self._polled_sources):
+                    table_seen = seen[table_name]
+                    items = [
+                        seg
+                        for seg in results[i]
+                        if seg.get("SegmentId") not in table_seen
+                    ]
+                    results[i] = items
+                    for seg in items:
+                        table_seen[seg.get("SegmentId")] = _logged_on(seg)
+                    if items:
+                        # Forget segments that have fallen out of the overlap.
+                        seen[table_name] = _prune_overlap(table_seen)
+                        cursors[table_name] = min(
+                            (lo for lo in seen[table_name].values() if lo),
+                            default=cursors[table_name],
+                        )
+
+                for segment in _merge_segments(self._polled_sources, results):
+                    self.publish(contact_id, segment, segment["speaker"])
+            except Exception as e:
+                logger.error(
+                    f"Error polling transcripts for call {contact_id}: {e}",
+                    exc_info=True,
+                )
+            await asyncio.sleep(FALLBACK_POLL_INTERVAL)
+
+
+transcript_streams = TranscriptStreamManager(
+    [
+        (CUSTOMER_TRANSCRIPT_TABLE_NAME, "Customer"),
+        (AGENT_TRANSCRIPT_TABLE_NAME, "Agent"),
+    ]
+)
 
-incoming_calls_manager = IncomingCallsManager()
 
 # --- API Endpoints ---
 # (The / and /details endpoints are unchanged and correct)
@@ -227,7 +1151,7 @@ async def read_root(request: Request):
         return templates.TemplateResponse("index.html", {"request": request})
     except TemplateNotFound:
         logger.warning("index.html not found. Serving JSON fallback for '/'.")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=200, content={"status": "ok", "message": "UI not available"}
         )
 
@@ -251,13 +1175,18 @@ async def get_contact_details(call_id: str):
     logger.info(f"Attempting to fetch details for call_id: {call_id}")
     try:
         # Note: get_item is also case-sensitive, but we got it right here.
-        response = details_table.get_item(Key={"contactId": call_id})
+        response = await get_dynamodb_client().get_item(
+            TableName=DETAILS_TABLE_NAME, Key={"contactId": {"S": call_id}}
+        )
         if "Item" not in response:
             raise HTTPException(
                 status_code=404, detail=f"Call ID '{call_id}' not found."
             )
         logger.info(f"Successfully found details for call_id: {call_id}")
-        return json.loads(json.dumps(response["Item"], cls=DecimalEncoder))
+        return Response(
+            orjson.dumps(_deserialize_image(response["Item"]), default=_json_default),
+            media_type="application/json",
+        )
     except ClientError as e:
         logger.error(
             f"AWS ClientError on get_contact_details: {e.response['Error']['Message']}"
@@ -267,55 +1196,57 @@ async def get_contact_details(call_id: str):
         )
 
 
-# --- THE CORRECTED WEBSOCKET FUNCTION ---
+# --- Transcript WebSocket ---
+async def _relay_segments(
+    websocket: WebSocket, queue: asyncio.Queue, skip_segment_ids: set
+) -> None:
+    """Forward segments published for a contact to a single viewer."""
+    try:
+        while True:
+            entry = await queue.get()
+            if entry is None:
+                logger.warning("Dropping transcript websocket with a full send queue")
+                # 1013 (try again later) tells the client to reconnect.
+                with contextlib.suppress(Exception):
+                    await websocket.close(code=1013)
+                return
+            segment_id, message = entry
+            if segment_id in skip_segment_ids:
+                continue
+            await websocket.send_text(_dumps(message))
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.info(f"Dropping transcript websocket after send failure: {e}")
+        with contextlib.suppress(Exception):
+            await websocket.close()
+
+
 @app.websocket("/ws/{call_id}")
 async def websocket_endpoint(websocket: WebSocket, call_id: str):
     await websocket.accept()
     logger.info(f"WebSocket connection established for Call ID: {call_id}")
 
-    sent_segment_ids = set()
-
+    # Subscribe before reading history so nothing written in between is lost;
+    # segments already sent as history are skipped when they show up again.
+    queue = transcript_streams.subscribe(call_id)
+    relay_task: Optional[asyncio.Task] = None
     try:
-        while True:
-            # --- FIX: Use 'ContactId' (Capital C, Capital I) to match the table's key schema ---
-            customer_response = customer_table.query(
-                KeyConditionExpression=Key("ContactId").eq(call_id)
-            )
-            agent_response = agent_table.query(
-                KeyConditionExpression=Key("ContactId").eq(call_id)
-            )
-
-            customer_segments = customer_response.get("Items", [])
-            for seg in customer_segments:
-                seg["speaker"] = "Customer"
-
-            agent_segments = agent_response.get("Items", [])
-            for seg in agent_segments:
-                seg["speaker"] = "Agent"
-
-            all_segments = customer_segments + agent_segments
-            all_segments.sort(key=lambda x: x.get("LoggedOn", ""))
-
-            new_segments_found = 0
-            for segment in all_segments:
-                segment_id = segment.get("SegmentId")
-
-                if segment_id and segment_id not in sent_segment_ids:
-                    new_segments_found += 1
-                    await websocket.send_json(
-                        {
-                            "speaker": segment["speaker"],
-                            "text": segment.get("Transcript", ""),
-                        }
-                    )
-                    sent_segment_ids.add(segment_id)
-
-            if new_segments_found > 0:
-                logger.info(
-                    f"Found and sent {new_segments_found} new segments for call {call_id}."
-                )
-
-            await asyncio.sleep(1)
+        history = await transcript_streams.fetch_history(call_id)
+        for _, message in history:
+            await websocket.send_text(_dumps(message))
+        if history:
+            logger.info(f"Sent {len(history)} existing segments for call {call_id}.")
+
+        backfilled_ids = {segment_id for segment_id, _ in history}
+        relay_task = asyncio.create_task(
+            _relay_segments(websocket, queue, backfilled_ids)
+        )
+        # New segments are pushed by the relay task; this loop only waits for
+        # the client to go away.
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+        logger.info(f"WebSocket disconnected for Call ID: {call_id}")
 
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected for Call ID: {call_id}")
@@ -323,18 +1254,29 @@ async def websocket_endpoint(websocket: WebSocket, call_id: str):
         logger.error(
             f"An error occurred in WebSocket for call {call_id}: {e}", exc_info=True
         )
+    finally:
+        if relay_task:
+            relay_task.cancel()
+        transcript_streams.unsubscribe(call_id, queue)
 
 
 @app.websocket("/ws/agent/{agent_id}")
 async def websocket_agent(websocket: WebSocket, agent_id: str):
     await websocket.accept()
+    previous = active_agent_connections.get(agent_id)
     active_agent_connections[agent_id] = websocket
+    if previous is not None:
+        # A reconnecting agent replaces its old socket; close it so it does
+        # not linger.
+        logger.info(f"Agent {agent_id} reconnected; closing previous websocket")
+        with contextlib.suppress(Exception):
+            await previous.close()
     logger.info(f"Agent websocket connected: {agent_id}")
     try:
         while True:
             data = await websocket.receive_text()
             try:
-                message = json.loads(data)
+                message = orjson.loads(data)
             except Exception:
                 continue
             msg_type = message.get("type")
@@ -352,16 +1294,44 @@ async def websocket_agent(websocket: WebSocket, agent_id: str):
     except WebSocketDisconnect:
         logger.info(f"Agent websocket disconnected: {agent_id}")
     finally:
-        active_agent_connections.pop(agent_id, None)
+        if active_agent_connections.get(agent_id) is websocket:
+            del active_agent_connections[agent_id]
 
 
 @app.get("/latest-call")
 async def get_latest_call():
-    """Scans the details table to find the most recent call."""
+    """Queries the details table's timestamp index for the most recent call."""
     logger.info("Polling for the latest call...")
+    global _latest_call_index_retry_at
+    dynamodb = get_dynamodb_client()
     try:
-        response = details_table.scan(Limit=20)
-        items = response.get("Items", [])
+        items = None
+        if time.monotonic() >= _latest_call_index_retry_at:
+            try:
+                response = await dynamodb.query(
+                    TableName=DETAILS_TABLE_NAME,
+                    IndexName=LATEST_CALL_INDEX,
+                    KeyConditionExpression="GSI1PK = :pk",
+                    ExpressionAttributeValues={":pk": {"S": LATEST_CALL_PARTITION}},
+                    ScanIndexForward=False,
+                    Limit=1,
+                )
+                items = [_deserialize_image(i) for i in response.get("Items", [])]
+            except ClientError as e:
+                if not _is_index_unavailable(e):
+                    raise
+                logger.warning(
+                    f"Index {LATEST_CALL_INDEX} unavailable, scanning for latest "
+                    f"calls for the next {LATEST_CALL_INDEX_RECHECK:.0f}s: {e}"
+                )
+                _latest_call_index_retry_at = (
+                    time.monotonic() + LATEST_CALL_INDEX_RECHECK
+                )
+        if items is None:
+            # Index missing or backfilling: fall back to the old sampled scan.
+            response = await dynamodb.scan(TableName=DETAILS_TABLE_NAME, Limit=20)
+            items = [_deserialize_image(i) for i in response.get("Items", [])]
+            items.sort(key=lambda x: x.get("callTimestamp", ""), reverse=True)
     except ClientError as e:
         traceback.print_exc()
         logger.error(f"AWS Error while polling for latest call: {e}")
@@ -372,13 +1342,10 @@ async def get_latest_call():
         raise HTTPException(status_code=500, detail="Server Error")
 
     if not items:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=404, content={"detail": "No recent calls found."}
         )
 
-    # Sort the items by timestamp (descending) to find the most recent one
-    items.sort(key=lambda x: x.get("callTimestamp", ""), reverse=True)
-
     latest_call = items[0]
     contact_id = latest_call.get("contactId")
     logger.info(f"Found latest call with ID: {contact_id}")
@@ -408,8 +1375,10 @@ async def start_call(call_data: dict):
 async def end_call(contact_id: str):
     """End an active Connect call."""
     try:
-        connect_client.stop_contact(
-            ContactId=contact_id, InstanceId=call_manager.instance_id
+        await asyncio.to_thread(
+            get_connect_client().stop_contact,
+            ContactId=contact_id,
+            InstanceId=call_manager.instance_id,
         )
         return {"status": "call_ended"}
     except Exception as e:
@@ -429,7 +1398,8 @@ async def update_agent_status(agent_id: str, status_data: dict):
     try:
         if ":agent/" in agent_id:
             agent_id = agent_id.split(":agent/")[-1]
-        connect_client.put_user_status(
+        await asyncio.to_thread(
+            get_connect_client().put_user_status,
             UserId=agent_id,
             InstanceId=call_manager.instance_id,
             AgentStatusId=status_data.get("status_id"),
@@ -443,23 +1413,25 @@ async def update_agent_status(agent_id: str, status_data: dict):
 # Ingest a new incoming call and broadcast to listeners
 @app.post("/api/incoming-call")
 async def incoming_call(payload: IncomingCall):
-    timestamp = payload.callTimestamp or datetime.now(timezone.utc).isoformat()
-    item = {
-        "contactId": payload.contactId,
-        "callTimestamp": timestamp,
-        "phoneNumber": payload.phoneNumber,
-        "customerName": payload.customerName,
-        "metadata": payload.metadata or {},
-    }
+    item = payload.model_dump(mode="json")
     try:
-        details_table.put_item(Item=item)
+        await details_writer.put(
+            {
+                **item,
+                "GSI1PK": LATEST_CALL_PARTITION,
+                "GSI1SK": item["callTimestamp"],
+            }
+        )
         logger.info(f"Stored incoming call: {payload.contactId}")
-    except ClientError as e:
+    except Exception as e:
         logger.error(f"Failed to store incoming call: {e}")
         raise HTTPException(status_code=500, detail="Failed to persist incoming call")
 
+    # Only announce calls that were stored, so a retried request is not
+    # shown to the dashboards twice.
     await incoming_calls_manager.broadcast({"type": "incoming_call", "data": item})
-    return JSONResponse(
+
+    return ORJSONResponse(
         status_code=201, content={"status": "created", "contactId": payload.contactId}
     )
 
@@ -470,8 +1442,12 @@ async def websocket_incoming_calls(websocket: WebSocket):
     incoming_calls_manager.connect(websocket)
     logger.info("WebSocket connected for incoming calls stream")
     try:
-        while True:
-            await asyncio.sleep(60)
+        # Nothing is expected from the client; reading just surfaces the
+        # close (or a failed keepalive ping) as soon as it happens.
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
     except WebSocketDisconnect:
+        pass
+    finally:
         incoming_calls_manager.disconnect(websocket)
         logger.info("WebSocket disconnected for incoming calls stream")
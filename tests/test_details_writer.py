@@ -0,0 +1,91 @@
+import asyncio
+import os
+import unittest
+from types import SimpleNamespace
+
+from botocore.exceptions import ClientError
+
+os.environ.setdefault("environment", "test")
+os.environ.setdefault("project", "travoiq")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from app import main  # noqa: E402
+
+
+def client_error(code):
+    return ClientError({"Error": {"Code": code, "Message": code}}, "BatchWriteItem")
+
+
+class FakeDynamoDB:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.batch_calls = []
+        self.put_calls = []
+
+    async def put_item(self, TableName, Item):
+        self.put_calls.append(Item)
+
+    async def batch_write_item(self, RequestItems):
+        self.batch_calls.append(RequestItems)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+class DetailsWriterTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.original_state = getattr(main.app.state, "dynamodb", None)
+        self.writer = main.DetailsWriter("details")
+
+    async def asyncTearDown(self):
+        await self.writer.stop()
+        main.app.state.dynamodb = self.original_state
+
+    async def write(self, items, responses):
+        main.app.state.dynamodb = dynamodb = FakeDynamoDB(responses)
+        await self.writer.start()
+        results = await asyncio.gather(
+            *(self.writer.put(item) for item in items), return_exceptions=True
+        )
+        return dynamodb, results
+
+    async def test_item_error_only_fails_its_caller(self):
+        # The serializer rejects floats before the batch is even sent.
+        dynamodb, results = await self.write(
+            [{"contactId": "a"}, {"contactId": "b", "bad": 1.5}], []
+        )
+        self.assertIsNone(results[0])
+        self.assertIsInstance(results[1], TypeError)
+        self.assertEqual(dynamodb.put_calls, [{"contactId": {"S": "a"}}])
+
+    async def test_throttling_fails_batch_without_item_retries(self):
+        dynamodb, results = await self.write(
+            [{"contactId": "a"}, {"contactId": "b"}],
+            [client_error("ProvisionedThroughputExceededException")],
+        )
+        self.assertTrue(all(isinstance(r, ClientError) for r in results))
+        self.assertEqual(dynamodb.put_calls, [])
+
+    async def test_unprocessed_items_are_resent(self):
+        unprocessed = {"details": [{"PutRequest": {"Item": {"contactId": {"S": "b"}}}}]}
+        dynamodb, results = await self.write(
+            [{"contactId": "a"}, {"contactId": "b"}],
+            [{"UnprocessedItems": unprocessed}, {"UnprocessedItems": {}}],
+        )
+        self.assertEqual(results, [None, None])
+        self.assertEqual(dynamodb.batch_calls[1], unprocessed)
+
+    async def test_duplicate_contacts_keep_last_write(self):
+        dynamodb, _ = await self.write(
+            [{"contactId": "a", "n": 1}, {"contactId": "a", "n": 2}],
+            [{"UnprocessedItems": {}}],
+        )
+        self.assertEqual(
+            dynamodb.batch_calls[0]["details"],
+            [{"PutRequest": {"Item": {"contactId": {"S": "a"}, "n": {"N": "2"}}}}],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import asyncio
+import os
+import unittest
+
+os.environ.setdefault("environment", "test")
+os.environ.setdefault("project", "travoiq")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from app import main  # noqa: E402
+
+
+class FakePubSub:
+    def __init__(self, redis):
+        self.redis = redis
+        self.queue = asyncio.Queue()
+
+    async def subscribe(self, channel):
+        self.redis.subscribers.add(self)
+
+    async def listen(self):
+        yield {"type": "subscribe", "data": 1}
+        while True:
+            message = await self.queue.get()
+            if isinstance(message, Exception):
+                raise message
+            yield {"type": "message", "data": message.encode()}
+
+    async def aclose(self):
+        self.redis.subscribers.discard(self)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.subscribers = set()
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+    async def publish(self, channel, message):
+        for pubsub in self.subscribers:
+            pubsub.queue.put_nowait(message)
+
+    async def aclose(self):
+        pass
+
+
+class IncomingCallsManagerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_resubscribes_after_connection_error(self):
+        redis = FakeRedis()
+        manager = main.IncomingCallsManager(redis)
+        delivered = []
+        manager._fan_out = delivered.append
+        await manager.start()
+        try:
+            await asyncio.sleep(0.01)
+            await manager.broadcast({"n": 1})
+            await asyncio.sleep(0.01)
+            self.assertEqual(delivered, ['{"n":1}'])
+
+            for pubsub in list(redis.subscribers):
+                pubsub.queue.put_nowait(ConnectionError("connection reset"))
+            await asyncio.sleep(0.01)
+            self.assertFalse(manager._subscribed)
+            # While the subscription is down, broadcasts are delivered locally.
+            await manager.broadcast({"n": 2})
+            self.assertEqual(delivered[-1], '{"n":2}')
+
+            await asyncio.sleep(1.1)
+            self.assertTrue(manager._subscribed)
+            await manager.broadcast({"n": 3})
+            await asyncio.sleep(0.01)
+            self.assertEqual(delivered, ['{"n":1}', '{"n":2}', '{"n":3}'])
+        finally:
+            await manager.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
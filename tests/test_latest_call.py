@@ -0,0 +1,77 @@
+import os
+import unittest
+from unittest import mock
+
+from botocore.exceptions import ClientError
+from fastapi import HTTPException
+
+os.environ.setdefault("environment", "test")
+os.environ.setdefault("project", "travoiq")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from app import main  # noqa: E402
+
+
+def validation_error(message):
+    return ClientError(
+        {"Error": {"Code": "ValidationException", "Message": message}}, "Query"
+    )
+
+
+class FakeDynamoDB:
+    def __init__(self, query_error=None):
+        self.query_error = query_error
+        self.queries = 0
+        self.scans = 0
+
+    async def query(self, **kwargs):
+        self.queries += 1
+        if self.query_error:
+            raise self.query_error
+        return {"Items": [{"contactId": {"S": "from-index"}}]}
+
+    async def scan(self, **kwargs):
+        self.scans += 1
+        return {
+            "Items": [
+                {"contactId": {"S": "old"}, "callTimestamp": {"S": "2024-01-01"}},
+                {"contactId": {"S": "new"}, "callTimestamp": {"S": "2024-02-01"}},
+            ]
+        }
+
+
+class LatestCallTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.original_state = getattr(main.app.state, "dynamodb", None)
+        patch = mock.patch.object(main, "_latest_call_index_retry_at", 0.0)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        main.app.state.dynamodb = self.original_state
+
+    async def test_uses_index(self):
+        main.app.state.dynamodb = dynamodb = FakeDynamoDB()
+        self.assertEqual(await main.get_latest_call(), {"contactId": "from-index"})
+        self.assertEqual(dynamodb.scans, 0)
+
+    async def test_missing_index_scans_and_is_remembered(self):
+        main.app.state.dynamodb = dynamodb = FakeDynamoDB(
+            validation_error("The table does not have the specified index: GSI1")
+        )
+        self.assertEqual(await main.get_latest_call(), {"contactId": "new"})
+        self.assertEqual(await main.get_latest_call(), {"contactId": "new"})
+        self.assertEqual((dynamodb.queries, dynamodb.scans), (1, 2))
+
+    async def test_other_validation_errors_are_not_hidden(self):
+        main.app.state.dynamodb = dynamodb = FakeDynamoDB(
+            validation_error("Invalid KeyConditionExpression")
+        )
+        with self.assertRaises(HTTPException) as raised:
+            await main.get_latest_call()
+        self.assertEqual(raised.exception.status_code, 500)
+        self.assertEqual(dynamodb.scans, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import asyncio
+import os
+import unittest
+
+os.environ.setdefault("environment", "test")
+os.environ.setdefault("project", "travoiq")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from app import main  # noqa: E402
+
+
+class PruneOverlapTest(unittest.TestCase):
+    def test_keeps_segments_within_overlap_in_stored_format(self):
+        seen = {
+            "a": "2024-05-01 09:59:50",
+            "b": "2024-05-01 09:59:59",
+            "c": "2024-05-01 10:00:03",
+        }
+        seen["old"] = "2024-05-01 09:59:40"
+        kept = main._prune_overlap(seen)
+        # b is inside the window; a is the anchor just before it.
+        self.assertEqual(kept, {"a": seen["a"], "b": seen["b"], "c": seen["c"]})
+        self.assertEqual(min(kept.values()), "2024-05-01 09:59:50")
+
+    def test_iso_with_zone(self):
+        seen = {"a": "2024-05-01T10:00:00.000Z", "b": "2024-05-01T10:00:04.500Z"}
+        self.assertEqual(main._prune_overlap(seen), seen)
+
+    def test_epoch_strings_get_an_overlap(self):
+        seen = {"old": "1714557580", "a": "1714557590", "b": "1714557597"}
+        seen["c"] = "1714557600"
+        kept = main._prune_overlap(seen)
+        self.assertEqual(set(kept), {"a", "b", "c"})
+
+    def test_epoch_milliseconds(self):
+        seen = {"a": "1714557580000", "b": "1714557590000", "c": "1714557600000"}
+        self.assertEqual(set(main._prune_overlap(seen)), {"b", "c"})
+
+    def test_unparseable_keeps_only_newest(self):
+        seen = {"a": "seg-001", "b": "seg-002"}
+        self.assertEqual(main._prune_overlap(seen), {"b": "seg-002"})
+
+
+class PollContactTest(unittest.IsolatedAsyncioTestCase):
+    async def test_late_segment_published_once(self):
+        rows = [
+            {"SegmentId": "a", "LoggedOn": "2024-05-01 10:00:00"},
+            {"SegmentId": "b", "LoggedOn": "2024-05-01 10:00:10"},
+        ]
+        cursors = []
+        manager = main.TranscriptStreamManager([])
+        manager._polled_sources = [("customer", "Customer")]
+
+        async def query_segments(query, after=""):
+            cursors.append(after)
+            return sorted(
+                (row for row in rows if row["LoggedOn"] > after),
+                key=main._logged_on,
+            )
+
+        published = []
+        manager._query_segments = query_segments
+        manager.publish = lambda contact_id, seg, speaker: published.append(
+            seg["SegmentId"]
+        )
+        original_interval = main.FALLBACK_POLL_INTERVAL
+        main.FALLBACK_POLL_INTERVAL = 0.01
+        try:
+            task = asyncio.create_task(manager._poll_contact("c1"))
+            await asyncio.sleep(0.05)
+            # Lands after the cursor moved past it, but inside the overlap.
+            rows.append({"SegmentId": "late", "LoggedOn": "2024-05-01 10:00:07"})
+            await asyncio.sleep(0.05)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        finally:
+            main.FALLBACK_POLL_INTERVAL = original_interval
+
+        self.assertEqual(published, ["a", "b", "late"])
+        self.assertEqual(cursors[0], "")
+        self.assertIn("2024-05-01 10:00:00", cursors[1:])
+        # The cursor never moves past the newest segment.
+        self.assertTrue(all(c <= "2024-05-01 10:00:10" for c in cursors))
+
+
+if __name__ == "__main__":
+    unittest.main()
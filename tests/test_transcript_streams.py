@@ -0,0 +1,207 @@
+import asyncio
+import os
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from botocore.exceptions import ClientError
+
+os.environ.setdefault("environment", "test")
+os.environ.setdefault("project", "travoiq")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from app import main  # noqa: E402
+
+
+class FakeWebSocket:
+    def __init__(self, fail_sends=False):
+        self.fail_sends = fail_sends
+        self.sent = []
+        self.close_codes = []
+
+    async def send_text(self, text):
+        if self.fail_sends:
+            raise RuntimeError("socket closed")
+        self.sent.append(text)
+
+    async def close(self, code=1000):
+        self.close_codes.append(code)
+
+
+class TranscriptRelayTest(unittest.IsolatedAsyncioTestCase):
+    async def test_full_queue_drops_viewer_and_closes_socket(self):
+        manager = main.TranscriptStreamManager([])
+        queue = manager.subscribe("c1")
+        for n in range(main.TRANSCRIPT_QUEUE_SIZE + 1):
+            manager.publish("c1", {"SegmentId": str(n), "Transcript": "hi"}, "Agent")
+        self.assertNotIn("c1", manager.contact_subscribers)
+
+        websocket = FakeWebSocket()
+        await asyncio.wait_for(main._relay_segments(websocket, queue, set()), 1)
+        self.assertEqual(websocket.close_codes, [1013])
+        self.assertEqual(websocket.sent, [])
+
+    async def test_send_failure_ends_relay_quietly(self):
+        queue = asyncio.Queue()
+        queue.put_nowait(("s1", {"speaker": "Agent", "text": "hi"}))
+        websocket = FakeWebSocket(fail_sends=True)
+        await asyncio.wait_for(main._relay_segments(websocket, queue, set()), 1)
+        self.assertEqual(websocket.close_codes, [1000])
+
+    async def test_backfilled_segments_are_skipped(self):
+        queue = asyncio.Queue()
+        queue.put_nowait(("s1", {"speaker": "Agent", "text": "old"}))
+        queue.put_nowait(("s2", {"speaker": "Agent", "text": "new"}))
+        queue.put_nowait(None)
+        websocket = FakeWebSocket()
+        await asyncio.wait_for(main._relay_segments(websocket, queue, {"s1"}), 1)
+        self.assertEqual(websocket.sent, ['{"speaker":"Agent","text":"new"}'])
+
+
+class FakeStreams:
+    """In-memory DynamoDB Streams client. Iterators are "shard:index"."""
+
+    def __init__(self):
+        self.shards = {}
+        self.iterator_requests = []
+        self.fail_next_get_records = False
+
+    def add_shard(self, shard_id, parent=None):
+        self.shards[shard_id] = {"parent": parent, "records": [], "closed": False}
+
+    def write(self, shard_id, contact_id, created=None):
+        records = self.shards[shard_id]["records"]
+        sequence = f"{shard_id}-{len(records)}"
+        records.append(
+            {
+                "eventName": "INSERT",
+                "dynamodb": {
+                    "SequenceNumber": sequence,
+                    "ApproximateCreationDateTime": created
+                    or datetime.now(timezone.utc),
+                    "NewImage": {
+                        "ContactId": {"S": contact_id},
+                        "SegmentId": {"S": sequence},
+                    },
+                },
+            }
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def describe_stream(self, StreamArn, **kwargs):
+        shards = []
+        for shard_id, shard in self.shards.items():
+            description = {"ShardId": shard_id, "SequenceNumberRange": {}}
+            if shard["parent"]:
+                description["ParentShardId"] = shard["parent"]
+            if shard["closed"]:
+                description["SequenceNumberRange"]["EndingSequenceNumber"] = "x"
+            shards.append(description)
+        return {"StreamDescription": {"Shards": shards}}
+
+    async def get_shard_iterator(self, StreamArn, ShardId, ShardIteratorType, **kw):
+        self.iterator_requests.append((ShardId, ShardIteratorType))
+        records = self.shards[ShardId]["records"]
+        if ShardIteratorType == "LATEST":
+            index = len(records)
+        elif ShardIteratorType == "TRIM_HORIZON":
+            index = 0
+        else:
+            sequences = [r["dynamodb"]["SequenceNumber"] for r in records]
+            index = sequences.index(kw["SequenceNumber"]) + 1
+        return {"ShardIterator": f"{ShardId}:{index}"}
+
+    async def get_records(self, ShardIterator):
+        if self.fail_next_get_records:
+            self.fail_next_get_records = False
+            raise ClientError(
+                {"Error": {"Code": "ExpiredIteratorException", "Message": "expired"}},
+                "GetRecords",
+            )
+        shard_id, index = ShardIterator.split(":")
+        shard = self.shards[shard_id]
+        records = shard["records"][int(index) :]
+        response = {"Records": records}
+        if not (shard["closed"] and not records):
+            response["NextShardIterator"] = f"{shard_id}:{len(shard['records'])}"
+        return response
+
+
+class ConsumeStreamTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.streams = FakeStreams()
+        self.manager = main.TranscriptStreamManager([])
+        self.published = []
+        self.manager.publish = lambda contact_id, seg, speaker: self.published.append(
+            seg["SegmentId"]
+        )
+        patches = [
+            mock.patch.object(main, "STREAM_POLL_INTERVAL", 0.01),
+            mock.patch.object(main, "STREAM_SHARD_REFRESH_INTERVAL", 0.01),
+            mock.patch.object(
+                main.aio_session, "create_client", lambda *a, **k: self.streams
+            ),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.task = None
+
+    async def asyncTearDown(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+
+    async def run_consumer(self):
+        self.task = asyncio.create_task(self.manager._consume_stream("arn", "Agent"))
+        await asyncio.sleep(0.05)
+
+    async def test_child_shard_read_after_closed_parent(self):
+        self.streams.add_shard("parent")
+        await self.run_consumer()
+        self.streams.write("parent", "c1")
+        self.streams.add_shard("child", parent="parent")
+        self.streams.write("child", "c1")
+        self.streams.shards["parent"]["closed"] = True
+        await asyncio.sleep(0.1)
+
+        self.assertEqual(self.published, ["parent-0", "child-0"])
+        self.assertIn(("child", "TRIM_HORIZON"), self.streams.iterator_requests)
+        self.assertNotIn(("child", "LATEST"), self.streams.iterator_requests)
+
+    async def test_resumes_after_last_sequence_number(self):
+        self.streams.add_shard("s")
+        await self.run_consumer()
+        self.streams.write("s", "c1")
+        await asyncio.sleep(0.05)
+        self.streams.fail_next_get_records = True
+        self.streams.write("s", "c1")
+        await asyncio.sleep(0.1)
+
+        self.assertEqual(self.published, ["s-0", "s-1"])
+        self.assertIn(("s", "AFTER_SEQUENCE_NUMBER"), self.streams.iterator_requests)
+
+    async def test_unpositioned_shard_replays_only_records_since_opening(self):
+        self.streams.add_shard("s")
+        old = datetime.now(timezone.utc) - timedelta(hours=1)
+        self.streams.write("s", "c1", created=old)
+        self.streams.fail_next_get_records = True
+        await self.run_consumer()
+        # Written while the consumer was recovering from the error.
+        self.streams.write("s", "c1")
+        await asyncio.sleep(0.1)
+
+        self.assertEqual(self.published, ["s-1"])
+        self.assertEqual(
+            self.streams.iterator_requests[:2],
+            [("s", "LATEST"), ("s", "TRIM_HORIZON")],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()